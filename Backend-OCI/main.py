@@ -1,12 +1,18 @@
 import os
 import oci
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from dotenv import load_dotenv
 from typing import Optional
+from pathlib import Path
+from collections import OrderedDict
 import json
 import base64
+import hashlib
+import re
+import threading
+import time
 
 # Cargar variables de entorno
 load_dotenv()
@@ -31,6 +37,24 @@ OCI_SERVICE_ENDPOINT = os.getenv("OCI_SERVICE_ENDPOINT", "https://inference.gene
 OCI_MODEL_ID = os.getenv("OCI_MODEL_ID", "meta.llama-3.3-70b-instruct")
 # Modelo para visión (imágenes)
 OCI_VISION_MODEL_ID = os.getenv("OCI_VISION_MODEL_ID", "meta.llama-3.2-90b-vision-instruct")
+# Contexto enviado al modelo de visión: "summary" (resumen en caché + mensajes recientes),
+# "recent" (solo mensajes recientes) o "full" (historial completo)
+VISION_CONTEXT_MODE = os.getenv("VISION_CONTEXT_MODE", "summary").strip().lower()
+if VISION_CONTEXT_MODE not in ("summary", "recent", "full"):
+    raise ValueError(
+        f"VISION_CONTEXT_MODE inválido: '{VISION_CONTEXT_MODE}'. Valores permitidos: summary, recent, full"
+    )
+# Mensajes recientes enviados tal cual; al menos 2 para que el último turno (cuyo formato
+# difiere entre el frontend y el backend) nunca forme parte del historial resumido
+VISION_CONTEXT_MESSAGES = int(os.getenv("VISION_CONTEXT_MESSAGES", "4"))
+if VISION_CONTEXT_MESSAGES < 2:
+    raise ValueError(f"VISION_CONTEXT_MESSAGES debe ser al menos 2 (valor: {VISION_CONTEXT_MESSAGES})")
+# Solo se resume el historial antiguo si supera este número de tokens (si no, se envía completo)
+VISION_SUMMARY_MIN_TOKENS = int(os.getenv("VISION_SUMMARY_MIN_TOKENS", "1000"))
+VISION_SUMMARY_MAX_TOKENS = int(os.getenv("VISION_SUMMARY_MAX_TOKENS", "300"))
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "256"))
+# Directorio donde se guarda el historial de chats (un archivo por chat)
+CHATS_DIR = Path(os.getenv("ATENA_CHATS_DIR", "chats"))
 
 # Inicializar cliente OCI
 config = oci.config.from_file(OCI_CONFIG_FILE, OCI_CONFIG_PROFILE)
@@ -50,6 +74,13 @@ class ChatResponse(BaseModel):
     response: str
     conversation_history: list
 
+class SaveChatRequest(BaseModel):
+    title: str
+    messages: list = []
+    conversation_history: list = []
+    created_at: Optional[int] = None
+    updated_at: Optional[int] = None
+
 # Configuración del asistente
 SYSTEM_PROMPT = """Eres Atena, un asistente virtual inteligente y sabio, inspirado en la diosa griega de la sabiduría.
 Respondes de manera concisa, clara y útil.
@@ -58,30 +89,42 @@ Ofreces perspectivas estratégicas y bien razonadas.
 Responde en el mismo idioma en que te escriban."""
 
 
-def build_chat_messages(conversation_history: list, user_message: str) -> list:
-    """Construye el historial de mensajes para OCI GenAI (solo texto)"""
-    messages = []
-    
-    # Agregar mensaje del sistema
+def message_text(msg: dict, image_placeholder: str = "[imagen]") -> str:
+    """Extrae el texto de un mensaje del historial (los mensajes con imágenes guardan solo su texto)"""
+    if isinstance(msg.get("content"), str):
+        return msg["content"]
+    if isinstance(msg.get("content"), list):
+        for item in msg["content"]:
+            if isinstance(item, dict) and item.get("type") == "text" and item.get("text"):
+                return item["text"]
+    return image_placeholder
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimación aproximada de tokens (~4 caracteres por token)"""
+    return (len(text) + 3) // 4
+
+
+def history_tokens(conversation_history: list) -> int:
+    """Estimación de tokens de prompt que ocupa un historial"""
+    return sum(estimate_tokens(message_text(msg)) for msg in conversation_history)
+
+
+def build_system_message(text: str):
+    """Construye el mensaje de sistema para OCI GenAI"""
     system_content = oci.generative_ai_inference.models.TextContent()
-    system_content.text = SYSTEM_PROMPT
+    system_content.text = text
     system_message = oci.generative_ai_inference.models.SystemMessage()
     system_message.content = [system_content]
-    messages.append(system_message)
-    
-    # Agregar historial de conversación
+    return system_message
+
+
+def build_history_messages(conversation_history: list, image_placeholder: str = "[imagen]") -> list:
+    """Convierte el historial de conversación en mensajes de OCI GenAI (solo texto)"""
+    messages = []
     for msg in conversation_history:
         content = oci.generative_ai_inference.models.TextContent()
-        if isinstance(msg.get("content"), str):
-            content.text = msg["content"]
-        elif isinstance(msg.get("content"), list):
-            # Extraer texto de mensajes con imágenes
-            text_content = ""
-            for item in msg["content"]:
-                if isinstance(item, dict) and item.get("type") == "text":
-                    text_content = item.get("text", "")
-                    break
-            content.text = text_content if text_content else "[imagen]"
+        content.text = message_text(msg, image_placeholder)
         
         if msg["role"] == "user":
             user_msg = oci.generative_ai_inference.models.UserMessage()
@@ -91,6 +134,13 @@ def build_chat_messages(conversation_history: list, user_message: str) -> list:
             assistant_msg = oci.generative_ai_inference.models.AssistantMessage()
             assistant_msg.content = [content]
             messages.append(assistant_msg)
+    return messages
+
+
+def build_chat_messages(conversation_history: list, user_message: str) -> list:
+    """Construye el historial de mensajes para OCI GenAI (solo texto)"""
+    messages = [build_system_message(SYSTEM_PROMPT)]
+    messages.extend(build_history_messages(conversation_history))
     
     # Agregar mensaje actual del usuario
     user_content = oci.generative_ai_inference.models.TextContent()
@@ -102,38 +152,176 @@ def build_chat_messages(conversation_history: list, user_message: str) -> list:
     return messages
 
 
-def build_vision_messages(conversation_history: list, user_message: str, images_base64: list) -> list:
-    """Construye mensajes con imágenes para el modelo de visión"""
-    messages = []
+def run_chat(messages: list, model_id: str, max_tokens: int = 1000, temperature: float = 0.7) -> str:
+    """Envía los mensajes a OCI GenAI y devuelve el texto de la respuesta"""
+    chat_request = oci.generative_ai_inference.models.GenericChatRequest()
+    chat_request.messages = messages
+    chat_request.api_format = oci.generative_ai_inference.models.BaseChatRequest.API_FORMAT_GENERIC
+    chat_request.max_tokens = max_tokens
+    chat_request.temperature = temperature
+    chat_request.top_p = 0.9
     
-    # Agregar mensaje del sistema
-    system_content = oci.generative_ai_inference.models.TextContent()
-    system_content.text = SYSTEM_PROMPT + "\nPuedes analizar y describir imágenes que te compartan."
-    system_message = oci.generative_ai_inference.models.SystemMessage()
-    system_message.content = [system_content]
-    messages.append(system_message)
+    chat_detail = oci.generative_ai_inference.models.ChatDetails()
+    chat_detail.serving_mode = oci.generative_ai_inference.models.OnDemandServingMode(
+        model_id=model_id
+    )
+    chat_detail.compartment_id = OCI_COMPARTMENT_ID
+    chat_detail.chat_request = chat_request
+    
+    response = genai_client.chat(chat_detail)
     
-    # Agregar historial de conversación (solo texto para el historial)
+    # Extraer respuesta
+    text = ""
+    if response.data.chat_response.choices:
+        choice = response.data.chat_response.choices[0]
+        if choice.message.content:
+            for content in choice.message.content:
+                if hasattr(content, 'text'):
+                    text += content.text
+    return text
+
+
+# Resúmenes del historial en caché, indexados por el hash del prefijo de la conversación.
+# Se generan en segundo plano al terminar cada turno; el modelo de visión solo los lee.
+summary_cache: "OrderedDict[str, str]" = OrderedDict()
+summary_lock = threading.Lock()
+
+SUMMARY_PROMPT = """Resume la conversación entre el usuario y Atena en pocas frases.
+Conserva los datos, nombres y decisiones importantes. Responde solo con el resumen,
+en el mismo idioma de la conversación."""
+
+
+def prefix_hashes(conversation_history: list) -> list:
+    """
+    Hash de cada prefijo del historial (hashes[i] identifica history[:i + 1]).
+    Solo se usan el rol y el texto, no campos extra como timestamp o image_url.
+    """
+    hasher = hashlib.sha256()
+    hashes = []
     for msg in conversation_history:
-        content = oci.generative_ai_inference.models.TextContent()
-        if isinstance(msg.get("content"), str):
-            content.text = msg["content"]
-        elif isinstance(msg.get("content"), list):
-            text_content = ""
-            for item in msg["content"]:
-                if isinstance(item, dict) and item.get("type") == "text":
-                    text_content = item.get("text", "")
-                    break
-            content.text = text_content if text_content else "[imagen enviada anteriormente]"
-        
-        if msg["role"] == "user":
-            user_msg = oci.generative_ai_inference.models.UserMessage()
-            user_msg.content = [content]
-            messages.append(user_msg)
-        elif msg["role"] == "assistant":
-            assistant_msg = oci.generative_ai_inference.models.AssistantMessage()
-            assistant_msg.content = [content]
-            messages.append(assistant_msg)
+        hasher.update(json.dumps([msg.get("role"), message_text(msg)], ensure_ascii=False).encode("utf-8"))
+        hashes.append(hasher.copy().hexdigest())
+    return hashes
+
+
+def cached_summary(conversation_history: list) -> tuple:
+    """
+    Busca en caché el resumen del prefijo más largo del historial.
+    Devuelve (resumen, número de mensajes que cubre) o ("", 0) si no hay ninguno.
+    """
+    hashes = prefix_hashes(conversation_history)
+    with summary_lock:
+        for i in range(len(hashes) - 1, -1, -1):
+            if hashes[i] in summary_cache:
+                summary_cache.move_to_end(hashes[i])
+                return summary_cache[hashes[i]], i + 1
+    return "", 0
+
+
+def summarize_history(conversation_history: list) -> int:
+    """
+    Genera y guarda en caché el resumen del historial; devuelve los tokens de prompt gastados.
+    Parte del resumen en caché del prefijo más largo y solo resume los mensajes nuevos,
+    así el coste de cada turno no crece con la longitud del chat.
+    """
+    previous_summary, start = cached_summary(conversation_history)
+    if start == len(conversation_history):
+        return 0
+    
+    transcript = "\n".join(
+        f"{'Usuario' if msg['role'] == 'user' else 'Atena'}: {message_text(msg)}"
+        for msg in conversation_history[start:]
+    )
+    if previous_summary:
+        transcript = f"Resumen previo: {previous_summary}\n\n{transcript}"
+    
+    user_content = oci.generative_ai_inference.models.TextContent()
+    user_content.text = transcript
+    user_msg = oci.generative_ai_inference.models.UserMessage()
+    user_msg.content = [user_content]
+    summary = run_chat(
+        [build_system_message(SUMMARY_PROMPT), user_msg],
+        OCI_MODEL_ID,
+        max_tokens=VISION_SUMMARY_MAX_TOKENS,
+        temperature=0.2
+    ).strip()
+    
+    with summary_lock:
+        summary_cache[prefix_hashes(conversation_history)[-1]] = summary
+        while len(summary_cache) > SUMMARY_CACHE_SIZE:
+            summary_cache.popitem(last=False)
+    return estimate_tokens(SUMMARY_PROMPT) + estimate_tokens(transcript)
+
+
+def has_images(conversation_history: list) -> bool:
+    """Indica si la conversación ya usó el modelo de visión (mensajes con imágenes)"""
+    return any(isinstance(msg.get("content"), list) for msg in conversation_history)
+
+
+def split_vision_history(conversation_history: list) -> tuple:
+    """Separa el historial en (mensajes antiguos, últimos VISION_CONTEXT_MESSAGES mensajes)"""
+    recent_count = min(max(VISION_CONTEXT_MESSAGES, 0), len(conversation_history))
+    split = len(conversation_history) - recent_count
+    return conversation_history[:split], conversation_history[split:]
+
+
+def refresh_history_summary(conversation_history: list) -> None:
+    """
+    Tarea en segundo plano tras cada turno de un chat con imágenes: deja en caché el resumen
+    de la parte antigua del historial para que la siguiente petición con imágenes lo encuentre listo.
+    """
+    if VISION_CONTEXT_MODE != "summary":
+        return
+    older, _ = split_vision_history(conversation_history)
+    if history_tokens(older) < VISION_SUMMARY_MIN_TOKENS:
+        return
+    try:
+        spent = summarize_history(older)
+        if spent:
+            print(f"Resumen del historial actualizado (~{spent} tokens de prompt)")
+    except Exception as e:
+        print(f"Error al resumir historial: {str(e)}")
+
+
+def build_vision_prefix(conversation_history: list) -> tuple:
+    """
+    Construye una sola vez por turno el prefijo (sistema + contexto) para el modelo de visión.
+    Según VISION_CONTEXT_MODE usa el historial completo ("full"), solo los últimos mensajes
+    ("recent") o el resumen en caché más los mensajes que este no cubre ("summary").
+    Nunca genera un resumen durante la petición: los mensajes sin resumir se envían tal cual
+    (el historial completo si no hay ningún resumen en caché).
+    Devuelve (mensajes, tokens de prompt ahorrados por llamada).
+    """
+    system_text = SYSTEM_PROMPT + "\nPuedes analizar y describir imágenes que te compartan."
+    older, recent = split_vision_history(conversation_history)
+    summary = ""
+    
+    if VISION_CONTEXT_MODE == "full" or not older:
+        context = conversation_history
+    elif VISION_CONTEXT_MODE == "summary" and history_tokens(older) < VISION_SUMMARY_MIN_TOKENS:
+        # Historial antiguo corto: enviarlo completo cuesta menos que un resumen
+        context = conversation_history
+    elif VISION_CONTEXT_MODE == "summary":
+        # El resumen en caché puede cubrir un prefijo más corto (la tarea en segundo plano
+        # aún no terminó o falló): el resto del historial antiguo se envía tal cual
+        summary, covered = cached_summary(older)
+        context = older[covered:] + recent
+    else:
+        context = recent
+    
+    if summary:
+        system_text += f"\n\nResumen de la conversación anterior:\n{summary}"
+    
+    messages = [build_system_message(system_text)]
+    messages.extend(build_history_messages(context, "[imagen enviada anteriormente]"))
+    
+    used_tokens = history_tokens(context) + estimate_tokens(summary)
+    return messages, max(history_tokens(conversation_history) - used_tokens, 0)
+
+
+def build_vision_messages(prefix_messages: list, user_message: str, images_base64: list) -> list:
+    """Construye mensajes con imágenes para el modelo de visión a partir del prefijo ya calculado"""
+    messages = list(prefix_messages)
     
     # Construir mensaje actual con imágenes
     current_content = []
@@ -159,6 +347,104 @@ def build_vision_messages(conversation_history: list, user_message: str, images_
     return messages
 
 
+# Almacenamiento del historial de chats
+# Cada chat se guarda en dos archivos propios: {id}.json (mensajes) y {id}.meta.json
+# (resumen compacto). Guardar o eliminar un chat solo escribe los archivos de ese chat.
+CHAT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+CHAT_SUMMARY_KEYS = {"id": str, "title": str, "created_at": int, "updated_at": int, "message_count": int}
+MAX_PAGE_SIZE = 100
+
+
+def write_json_atomic(path: Path, data) -> None:
+    """Escribe JSON compacto de forma atómica (archivo temporal + reemplazo)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def chat_file(chat_id: str) -> Path:
+    """Devuelve la ruta del archivo de mensajes de un chat validando su ID"""
+    if not CHAT_ID_PATTERN.match(chat_id):
+        raise HTTPException(status_code=400, detail="ID de chat inválido")
+    return CHATS_DIR / f"{chat_id}.json"
+
+
+def chat_meta_file(chat_id: str) -> Path:
+    """Devuelve la ruta del archivo de resumen de un chat"""
+    return chat_file(chat_id).with_suffix(".meta.json")
+
+
+def build_chat_summary(chat: dict) -> dict:
+    """Resumen compacto de un chat (sin mensajes)"""
+    return {
+        "id": chat["id"],
+        "title": chat["title"],
+        "created_at": chat["created_at"],
+        "updated_at": chat["updated_at"],
+        "message_count": len(chat["messages"])
+    }
+
+
+def is_valid_chat_summary(summary, chat_id: str) -> bool:
+    """Comprueba que un resumen tenga todas las claves requeridas con el tipo correcto"""
+    return (
+        isinstance(summary, dict)
+        and all(isinstance(summary.get(key), kind) for key, kind in CHAT_SUMMARY_KEYS.items())
+        and summary["id"] == chat_id
+    )
+
+
+def load_chat_summaries() -> dict:
+    """
+    Carga los resúmenes de todos los chats ({id: resumen}).
+    Si el resumen de un chat falta, está dañado o es anterior a su archivo de mensajes
+    (por ejemplo, tras un corte entre las dos escrituras de save_chat) se reconstruye;
+    los chats ilegibles se omiten para no impedir el arranque de la API.
+    """
+    summaries = {}
+    if not CHATS_DIR.exists():
+        return summaries
+    for path in CHATS_DIR.glob("*.json"):
+        if path.name.endswith(".meta.json"):
+            continue
+        chat_id = path.stem
+        if not CHAT_ID_PATTERN.match(chat_id):
+            continue
+        meta_path = chat_meta_file(chat_id)
+        try:
+            if meta_path.stat().st_mtime_ns >= path.stat().st_mtime_ns:
+                with open(meta_path, encoding="utf-8") as f:
+                    summary = json.load(f)
+                if is_valid_chat_summary(summary, chat_id):
+                    summaries[chat_id] = summary
+                    continue
+        except (OSError, json.JSONDecodeError):
+            pass
+        try:
+            with open(path, encoding="utf-8") as f:
+                summary = build_chat_summary(json.load(f))
+            if not is_valid_chat_summary(summary, chat_id):
+                raise ValueError("faltan campos del chat")
+            write_json_atomic(meta_path, summary)
+            summaries[chat_id] = summary
+            print(f"Resumen del chat {chat_id} reconstruido")
+        except (OSError, json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            print(f"Chat {chat_id} omitido, archivo dañado: {str(e)}")
+    return summaries
+
+
+def paginate(items: list, offset: int, limit: int) -> list:
+    """Devuelve una página de la lista acotando offset y limit"""
+    offset = max(offset, 0)
+    limit = min(max(limit, 1), MAX_PAGE_SIZE)
+    return items[offset:offset + limit]
+
+
+chat_summaries = load_chat_summaries()
+
+
 @app.get("/")
 async def root():
     return {
@@ -177,38 +463,13 @@ async def health_check():
 
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, background_tasks: BackgroundTasks):
     try:
         # Construir mensajes
         messages = build_chat_messages(request.conversation_history, request.message)
         
-        # Configurar la petición de chat
-        chat_request = oci.generative_ai_inference.models.GenericChatRequest()
-        chat_request.messages = messages
-        chat_request.api_format = oci.generative_ai_inference.models.BaseChatRequest.API_FORMAT_GENERIC
-        chat_request.max_tokens = 1000
-        chat_request.temperature = 0.7
-        chat_request.top_p = 0.9
-        
-        # Configurar detalles del chat
-        chat_detail = oci.generative_ai_inference.models.ChatDetails()
-        chat_detail.serving_mode = oci.generative_ai_inference.models.OnDemandServingMode(
-            model_id=OCI_MODEL_ID
-        )
-        chat_detail.compartment_id = OCI_COMPARTMENT_ID
-        chat_detail.chat_request = chat_request
-        
         # Llamar a la API de OCI
-        response = genai_client.chat(chat_detail)
-        
-        # Extraer respuesta
-        assistant_message = ""
-        if response.data.chat_response.choices:
-            choice = response.data.chat_response.choices[0]
-            if choice.message.content:
-                for content in choice.message.content:
-                    if hasattr(content, 'text'):
-                        assistant_message += content.text
+        assistant_message = run_chat(messages, OCI_MODEL_ID)
         
         # Actualizar historial
         updated_history = request.conversation_history + [
@@ -216,6 +477,11 @@ async def chat(request: ChatRequest):
             {"role": "assistant", "content": assistant_message}
         ]
         
+        # Preparar en segundo plano el resumen que usará el modelo de visión,
+        # solo en chats que ya enviaron imágenes
+        if has_images(updated_history):
+            background_tasks.add_task(refresh_history_summary, updated_history)
+        
         return ChatResponse(
             response=assistant_message,
             conversation_history=updated_history
@@ -228,6 +494,7 @@ async def chat(request: ChatRequest):
 
 @app.post("/chat-with-image")
 async def chat_with_image(
+    background_tasks: BackgroundTasks,
     message: str = Form(...),
     conversation_history: str = Form("[]"),
     images: list[UploadFile] = File(...)
@@ -251,6 +518,9 @@ async def chat_with_image(
         num_images = len(images_base64)
         print(f"Procesando {num_images} imagen(es) con modelo de visión...")
         
+        # Prefijo compartido (sistema + contexto), calculado una sola vez para todas las imágenes
+        prefix_messages, tokens_saved_per_call = build_vision_prefix(history)
+        
         # OCI solo permite 1 imagen por solicitud
         # Si hay múltiples imágenes, procesarlas secuencialmente
         all_responses = []
@@ -263,35 +533,10 @@ async def chat_with_image(
                 img_message = message if message.strip() else "¿Qué puedes decirme sobre esta imagen?"
             
             # Construir mensajes con UNA sola imagen
-            messages = build_vision_messages(history, img_message, [img_base64])
+            messages = build_vision_messages(prefix_messages, img_message, [img_base64])
             
-            # Configurar la petición de chat
-            chat_request = oci.generative_ai_inference.models.GenericChatRequest()
-            chat_request.messages = messages
-            chat_request.api_format = oci.generative_ai_inference.models.BaseChatRequest.API_FORMAT_GENERIC
-            chat_request.max_tokens = 1000
-            chat_request.temperature = 0.7
-            chat_request.top_p = 0.9
-            
-            # Configurar detalles del chat - USAR MODELO DE VISIÓN
-            chat_detail = oci.generative_ai_inference.models.ChatDetails()
-            chat_detail.serving_mode = oci.generative_ai_inference.models.OnDemandServingMode(
-                model_id=OCI_VISION_MODEL_ID
-            )
-            chat_detail.compartment_id = OCI_COMPARTMENT_ID
-            chat_detail.chat_request = chat_request
-            
-            # Llamar a la API de OCI
-            response = genai_client.chat(chat_detail)
-            
-            # Extraer respuesta
-            img_response = ""
-            if response.data.chat_response.choices:
-                choice = response.data.chat_response.choices[0]
-                if choice.message.content:
-                    for content in choice.message.content:
-                        if hasattr(content, 'text'):
-                            img_response += content.text
+            # Llamar a la API de OCI - USAR MODELO DE VISIÓN
+            img_response = run_chat(messages, OCI_VISION_MODEL_ID)
             
             all_responses.append(img_response)
             print(f"Imagen {i+1}/{num_images} procesada")
@@ -305,7 +550,11 @@ async def chat_with_image(
         else:
             assistant_message = all_responses[0]
         
-        print(f"Respuesta completa generada")
+        # Tokens de prompt ahorrados frente a enviar el historial completo en cada imagen
+        # (el resumen se genera en segundo plano, fuera de esta petición)
+        prompt_tokens_saved = tokens_saved_per_call * num_images
+        
+        print(f"Respuesta completa generada (tokens de prompt ahorrados: ~{prompt_tokens_saved})")
         
         # Construir contenido del usuario para el historial
         user_content = [
@@ -318,9 +567,13 @@ async def chat_with_image(
             {"role": "assistant", "content": assistant_message}
         ]
         
+        # Preparar el resumen para la siguiente petición (también tras un fallo de caché)
+        background_tasks.add_task(refresh_history_summary, updated_history)
+        
         return {
             "response": assistant_message,
-            "conversation_history": updated_history
+            "conversation_history": updated_history,
+            "prompt_tokens_saved": prompt_tokens_saved
         }
         
     except oci.exceptions.ServiceError as e:
@@ -342,6 +595,102 @@ async def chat_with_image(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/chats")
+async def list_chats(offset: int = 0, limit: int = 20):
+    """Lista paginada de resúmenes de chats (sin mensajes), del más reciente al más antiguo"""
+    summaries = sorted(chat_summaries.values(), key=lambda c: c["created_at"], reverse=True)
+    return {
+        "total": len(summaries),
+        "offset": offset,
+        "chats": paginate(summaries, offset, limit)
+    }
+
+
+@app.get("/chats/{chat_id}")
+async def get_chat(chat_id: str):
+    """Devuelve un chat completo (mensajes e historial de conversación)"""
+    path = chat_file(chat_id)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Chat no encontrado")
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@app.get("/chats/{chat_id}/messages")
+async def get_chat_messages(chat_id: str, offset: int = 0, limit: int = 50):
+    """Devuelve una página de los mensajes de un chat"""
+    chat = await get_chat(chat_id)
+    return {
+        "total": len(chat["messages"]),
+        "offset": offset,
+        "messages": paginate(chat["messages"], offset, limit)
+    }
+
+
+@app.get("/chats/{chat_id}/history")
+async def get_chat_history(chat_id: str, offset: int = 0, limit: int = 50):
+    """Devuelve una página del historial de conversación que se envía al modelo"""
+    chat = await get_chat(chat_id)
+    return {
+        "total": len(chat["conversation_history"]),
+        "offset": offset,
+        "conversation_history": paginate(chat["conversation_history"], offset, limit)
+    }
+
+
+@app.put("/chats/{chat_id}")
+async def save_chat(chat_id: str, request: SaveChatRequest):
+    """
+    Crea o actualiza un chat; solo se escriben los archivos de ese chat.
+    Rechaza con 409 una versión más antigua que la guardada (PUT atrasado).
+    """
+    path = chat_file(chat_id)
+    now = int(time.time() * 1000)
+    existing = chat_summaries.get(chat_id)
+    if existing and request.updated_at is not None and request.updated_at < existing["updated_at"]:
+        raise HTTPException(status_code=409, detail="Existe una versión más reciente del chat")
+    if request.created_at is not None:
+        created_at = request.created_at
+    else:
+        created_at = existing["created_at"] if existing else now
+
+    chat = {
+        "id": chat_id,
+        "title": request.title,
+        "created_at": created_at,
+        "updated_at": request.updated_at if request.updated_at is not None else now,
+        "messages": request.messages,
+        "conversation_history": request.conversation_history
+    }
+    summary = build_chat_summary(chat)
+    write_json_atomic(path, chat)
+    write_json_atomic(chat_meta_file(chat_id), summary)
+    chat_summaries[chat_id] = summary
+    return summary
+
+
+@app.delete("/chats/{chat_id}")
+async def delete_chat(chat_id: str):
+    """Elimina un chat"""
+    path = chat_file(chat_id)
+    if chat_id not in chat_summaries and not path.exists():
+        raise HTTPException(status_code=404, detail="Chat no encontrado")
+    path.unlink(missing_ok=True)
+    chat_meta_file(chat_id).unlink(missing_ok=True)
+    chat_summaries.pop(chat_id, None)
+    return {"deleted": chat_id}
+
+
+@app.delete("/chats")
+async def delete_all_chats():
+    """Elimina todo el historial de chats"""
+    for chat_id in list(chat_summaries):
+        chat_file(chat_id).unlink(missing_ok=True)
+        chat_meta_file(chat_id).unlink(missing_ok=True)
+    chat_summaries.clear()
+    return {"deleted": "all"}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,359 @@
+// Historial de chats: el backend (/chats) es el almacenamiento principal e IndexedDB
+// actúa como caché local. Los resúmenes (título, fechas) y los mensajes se guardan en
+// stores separados: la barra lateral lee resúmenes por páginas y los mensajes se cargan
+// al abrir un chat. Cada guardado escribe únicamente el chat que cambió.
+// Los cambios que no llegan al backend (chats marcados como pendientes y borrados
+// pendientes) se reenvían en la siguiente sincronización.
+
+const API_URL = 'http://localhost:8000'
+const DB_NAME = 'atena'
+const DB_VERSION = 3
+const SUMMARIES_STORE = 'chats'
+const BODIES_STORE = 'chat-bodies'
+const DELETES_STORE = 'chat-deletes'
+const CREATED_AT_INDEX = 'createdAt'
+const DIRTY_INDEX = 'dirty'
+const LEGACY_STORAGE_KEY = 'atena-chats'
+// ID reservado para el borrado de todo el historial (no es un ID de chat válido en el backend)
+const ALL_CHATS = '*'
+
+export const CHATS_PAGE_SIZE = 30
+
+export interface ChatSummary {
+  id: string
+  title: string
+  createdAt: number
+  updatedAt: number
+}
+
+export interface ChatBody<T> {
+  id: string
+  messages: T[]
+  conversationHistory: T[]
+}
+
+// Resumen en caché; dirty = 1 si el chat aún no se ha guardado en el backend
+interface CachedChatSummary extends ChatSummary {
+  dirty?: 1
+}
+
+interface RemoteChatSummary {
+  id: string
+  title: string
+  created_at: number
+  updated_at: number
+}
+
+interface Stores {
+  summaries: IDBObjectStore
+  bodies: IDBObjectStore
+  deletes: IDBObjectStore
+}
+
+let dbPromise: Promise<IDBDatabase> | null = null
+
+const openDb = (): Promise<IDBDatabase> => {
+  if (!dbPromise) {
+    dbPromise = new Promise((resolve, reject) => {
+      const request = indexedDB.open(DB_NAME, DB_VERSION)
+      request.onupgradeneeded = (event) => {
+        const db = request.result
+        if (event.oldVersion < 1) {
+          db.createObjectStore(SUMMARIES_STORE, { keyPath: 'id' })
+          db.createObjectStore(BODIES_STORE, { keyPath: 'id' })
+        }
+        if (!db.objectStoreNames.contains(DELETES_STORE)) {
+          db.createObjectStore(DELETES_STORE, { keyPath: 'id' })
+        }
+        // Índices para leer la barra lateral por páginas y encontrar los chats pendientes
+        const summaries = request.transaction!.objectStore(SUMMARIES_STORE)
+        if (!summaries.indexNames.contains(CREATED_AT_INDEX)) {
+          summaries.createIndex(CREATED_AT_INDEX, 'createdAt')
+        }
+        if (!summaries.indexNames.contains(DIRTY_INDEX)) {
+          summaries.createIndex(DIRTY_INDEX, 'dirty')
+        }
+      }
+      request.onsuccess = () => resolve(request.result)
+      request.onerror = () => {
+        dbPromise = null
+        reject(request.error)
+      }
+    })
+  }
+  return dbPromise
+}
+
+// Ejecuta una transacción y resuelve cuando termina
+const runTransaction = async <R>(
+  mode: IDBTransactionMode,
+  run: (stores: Stores) => IDBRequest<R> | void
+): Promise<R | undefined> => {
+  const db = await openDb()
+  return new Promise((resolve, reject) => {
+    const tx = db.transaction([SUMMARIES_STORE, BODIES_STORE, DELETES_STORE], mode)
+    const request = run({
+      summaries: tx.objectStore(SUMMARIES_STORE),
+      bodies: tx.objectStore(BODIES_STORE),
+      deletes: tx.objectStore(DELETES_STORE),
+    })
+    tx.oncomplete = () => resolve(request ? request.result : undefined)
+    tx.onerror = () => reject(tx.error)
+    tx.onabort = () => reject(tx.error)
+  })
+}
+
+const toSummary = ({ dirty, ...summary }: CachedChatSummary): ChatSummary => summary
+
+const fetchJson = async (path: string, init?: RequestInit) => {
+  const response = await fetch(`${API_URL}${path}`, init)
+  if (!response.ok) {
+    throw new Error(`Error ${response.status} en ${path}`)
+  }
+  return response.json()
+}
+
+// Envía un chat al backend y lo marca como guardado si no cambió entretanto.
+// Un 409 indica que el backend ya tiene una versión más reciente, que llega al sincronizar.
+const pushChat = async <T>(summary: ChatSummary, body: ChatBody<T>): Promise<void> => {
+  const response = await fetch(`${API_URL}/chats/${summary.id}`, {
+    method: 'PUT',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({
+      title: summary.title,
+      messages: body.messages,
+      conversation_history: body.conversationHistory,
+      created_at: summary.createdAt,
+      updated_at: summary.updatedAt,
+    }),
+  })
+  if (!response.ok && response.status !== 409) {
+    throw new Error(`Error ${response.status} al guardar el chat ${summary.id}`)
+  }
+  await runTransaction('readwrite', ({ summaries }) => {
+    const request = summaries.get(summary.id)
+    request.onsuccess = () => {
+      const cached = request.result as CachedChatSummary | undefined
+      if (cached?.dirty && cached.updatedAt === summary.updatedAt) {
+        summaries.put(toSummary(cached))
+      }
+    }
+  })
+}
+
+// Envía un borrado pendiente al backend y lo descarta cuando se confirma
+const pushDelete = async (id: string): Promise<void> => {
+  const response = await fetch(`${API_URL}/chats${id === ALL_CHATS ? '' : `/${id}`}`, { method: 'DELETE' })
+  if (!response.ok && response.status !== 404) {
+    throw new Error(`Error ${response.status} al eliminar ${id}`)
+  }
+  await runTransaction('readwrite', ({ deletes }) => {
+    deletes.delete(id)
+  })
+}
+
+// Reenvía al backend los borrados y los chats que quedaron pendientes.
+// El borrado total va primero para no eliminar chats creados después.
+const syncPendingChanges = async (): Promise<void> => {
+  const pendingDeletes = await runTransaction<{ id: string }[]>('readonly', ({ deletes }) => deletes.getAll())
+  const deleteIds = (pendingDeletes || []).map(({ id }) => id)
+  if (deleteIds.includes(ALL_CHATS)) {
+    await pushDelete(ALL_CHATS)
+  }
+  for (const id of deleteIds.filter(id => id !== ALL_CHATS)) {
+    await pushDelete(id)
+  }
+
+  const dirty = await runTransaction<CachedChatSummary[]>('readonly', ({ summaries }) => summaries.index(DIRTY_INDEX).getAll())
+  for (const summary of dirty || []) {
+    const body = await runTransaction<ChatBody<unknown>>('readonly', ({ bodies }) => bodies.get(summary.id))
+    if (body) {
+      await pushChat(toSummary(summary), body)
+    }
+  }
+}
+
+// Actualiza la caché con una página de resúmenes del backend:
+// guarda los más recientes que los locales (descartando sus mensajes en caché para volver
+// a cargarlos) y elimina los chats ya guardados que el backend no devuelve en ese rango.
+const mergeRemotePage = async (remote: ChatSummary[], offset: number, limit: number): Promise<void> => {
+  const remoteIds = new Set(remote.map(chat => chat.id))
+  // Sin resultados más allá de la primera página no se conoce el rango: no se elimina nada
+  const canEvict = offset === 0 || remote.length > 0
+  const upper = offset === 0 ? undefined : remote[0]?.createdAt
+  const lower = remote.length < limit ? undefined : remote[remote.length - 1].createdAt
+  const range = upper !== undefined && lower !== undefined
+    ? IDBKeyRange.bound(lower, upper, true, true)
+    : upper !== undefined
+      ? IDBKeyRange.upperBound(upper, true)
+      : lower !== undefined
+        ? IDBKeyRange.lowerBound(lower, true)
+        : null
+
+  await runTransaction('readwrite', ({ summaries, bodies, deletes }) => {
+    if (canEvict) {
+      const cursorRequest = summaries.index(CREATED_AT_INDEX).openCursor(range)
+      cursorRequest.onsuccess = () => {
+        const cursor = cursorRequest.result
+        if (!cursor) return
+        const cached = cursor.value as CachedChatSummary
+        if (!cached.dirty && !remoteIds.has(cached.id)) {
+          cursor.delete()
+          bodies.delete(cached.id)
+        }
+        cursor.continue()
+      }
+    }
+
+    remote.forEach(summary => {
+      const pendingDelete = deletes.get(summary.id)
+      pendingDelete.onsuccess = () => {
+        if (pendingDelete.result) return
+        const request = summaries.get(summary.id)
+        request.onsuccess = () => {
+          const local = request.result as CachedChatSummary | undefined
+          if (!local || local.updatedAt < summary.updatedAt) {
+            summaries.put(summary)
+            bodies.delete(summary.id)
+          }
+        }
+      }
+    })
+  })
+}
+
+// Lee una página de resúmenes de la caché, del más reciente al más antiguo
+const readLocalSummaries = async (offset: number, limit: number): Promise<ChatSummary[]> => {
+  const db = await openDb()
+  return new Promise((resolve, reject) => {
+    const page: ChatSummary[] = []
+    let skipped = offset === 0
+    const tx = db.transaction(SUMMARIES_STORE, 'readonly')
+    const request = tx.objectStore(SUMMARIES_STORE).index(CREATED_AT_INDEX).openCursor(null, 'prev')
+    request.onsuccess = () => {
+      const cursor = request.result
+      if (!cursor) return
+      if (!skipped) {
+        skipped = true
+        cursor.advance(offset)
+        return
+      }
+      page.push(toSummary(cursor.value))
+      if (page.length < limit) cursor.continue()
+    }
+    tx.oncomplete = () => resolve(page)
+    tx.onerror = () => reject(tx.error)
+  })
+}
+
+// Lista una página de resúmenes de chats, del más reciente al más antiguo.
+// Antes reenvía los cambios pendientes; si el backend no responde se usa solo la caché local.
+export const listChatSummaries = async (offset: number, limit: number = CHATS_PAGE_SIZE): Promise<ChatSummary[]> => {
+  try {
+    await syncPendingChanges()
+    const data = await fetchJson(`/chats?offset=${offset}&limit=${limit}`)
+    await mergeRemotePage(data.chats.map((chat: RemoteChatSummary) => ({
+      id: chat.id,
+      title: chat.title,
+      createdAt: chat.created_at,
+      updatedAt: chat.updated_at,
+    })), offset, limit)
+  } catch (error) {
+    console.error('Error:', error)
+  }
+  return readLocalSummaries(offset, limit)
+}
+
+// Carga los mensajes de un chat (solo cuando se abre), desde la caché o del backend
+export const loadChatBody = async <T>(id: string): Promise<ChatBody<T> | undefined> => {
+  const cached = await runTransaction<ChatBody<T>>('readonly', ({ bodies }) => bodies.get(id))
+  if (cached) return cached
+
+  // Una sola petición: el backend lee el archivo del chat una vez
+  const chat = await fetchJson(`/chats/${id}`)
+  const body: ChatBody<T> = {
+    id,
+    messages: chat.messages,
+    conversationHistory: chat.conversation_history,
+  }
+  await runTransaction('readwrite', ({ bodies }) => {
+    bodies.put(body)
+  })
+  return body
+}
+
+// Guarda un único chat (resumen + mensajes) en la caché, marcado como pendiente
+// hasta que el backend lo confirme
+export const saveChat = async <T>(summary: ChatSummary, body: ChatBody<T>): Promise<void> => {
+  const cached: CachedChatSummary = { ...toSummary(summary), dirty: 1 }
+  await runTransaction('readwrite', ({ summaries, bodies }) => {
+    summaries.put(cached)
+    bodies.put(body)
+  })
+  pushChat(cached, body).catch(error => console.error('Error:', error))
+}
+
+export const deleteChat = async (id: string): Promise<void> => {
+  await runTransaction('readwrite', ({ summaries, bodies, deletes }) => {
+    summaries.delete(id)
+    bodies.delete(id)
+    deletes.put({ id })
+  })
+  pushDelete(id).catch(error => console.error('Error:', error))
+}
+
+export const clearChats = async (): Promise<void> => {
+  await runTransaction('readwrite', ({ summaries, bodies, deletes }) => {
+    summaries.clear()
+    bodies.clear()
+    deletes.clear()
+    deletes.put({ id: ALL_CHATS })
+  })
+  pushDelete(ALL_CHATS).catch(error => console.error('Error:', error))
+}
+
+// Migra los chats guardados en localStorage (formato anterior) a IndexedDB.
+// Quedan marcados como pendientes y se envían al backend en la siguiente sincronización.
+export const migrateLegacyChats = async (): Promise<void> => {
+  const raw = localStorage.getItem(LEGACY_STORAGE_KEY)
+  if (!raw) return
+
+  let legacyChats: Array<{
+    id: string
+    title: string
+    messages: unknown[]
+    conversationHistory: unknown[]
+    createdAt: number
+  }>
+  try {
+    legacyChats = JSON.parse(raw)
+    if (!Array.isArray(legacyChats)) throw new Error('Formato de historial no válido')
+  } catch (error) {
+    // Conservar el valor dañado con otro nombre para no reintentar en cada carga
+    console.error('Error al migrar el historial:', error)
+    localStorage.setItem(`${LEGACY_STORAGE_KEY}-corrupt`, raw)
+    localStorage.removeItem(LEGACY_STORAGE_KEY)
+    return
+  }
+
+  await runTransaction('readwrite', ({ summaries, bodies }) => {
+    legacyChats.forEach(chat => {
+      const summary: CachedChatSummary = {
+        id: chat.id,
+        title: chat.title,
+        createdAt: chat.createdAt,
+        updatedAt: chat.createdAt,
+        dirty: 1
+      }
+      summaries.put(summary)
+      bodies.put({
+        id: chat.id,
+        messages: chat.messages || [],
+        conversationHistory: chat.conversationHistory || []
+      })
+    })
+  })
+  localStorage.removeItem(LEGACY_STORAGE_KEY)
+}
@@ -2,6 +2,8 @@
 
 import { useState, useRef, useEffect, DragEvent } from 'react'
 import styles from './page.module.css'
+import * as chatStorage from './chatStorage'
+import type { ChatSummary } from './chatStorage'
 
 interface Message {
   role: 'user' | 'assistant'
@@ -19,14 +21,6 @@ interface MessageContent {
   }
 }
 
-interface SavedChat {
-  id: string
-  title: string
-  messages: Message[]
-  conversationHistory: Message[]
-  createdAt: number
-}
-
 // Traducciones para los diferentes idiomas
 const translations = {
   'es-ES': {
@@ -312,8 +306,11 @@ export default function Home() {
   const [isListening, setIsListening] = useState(false)
   const [voiceLang, setVoiceLang] = useState<Language>('es-ES')
   const [sidebarOpen, setSidebarOpen] = useState(false)
-  const [savedChats, setSavedChats] = useState<SavedChat[]>([])
+  const [savedChats, setSavedChats] = useState<ChatSummary[]>([])
   const [currentChatId, setCurrentChatId] = useState<string | null>(null)
+  const [hasMoreChats, setHasMoreChats] = useState(true)
+  const lastSavedRef = useRef<{ messages: Message[]; conversationHistory: Message[] } | null>(null)
+  const loadingChatsRef = useRef(false)
   const messagesEndRef = useRef<HTMLDivElement>(null)
   const textareaRef = useRef<HTMLTextAreaElement>(null)
   const fileInputRef = useRef<HTMLInputElement>(null)
@@ -322,6 +319,28 @@ export default function Home() {
   // Obtener traducciones según el idioma seleccionado
   const t = translations[voiceLang]
 
+  // Cargar la siguiente página de chats guardados (solo resúmenes)
+  const loadMoreChats = async () => {
+    if (loadingChatsRef.current || !hasMoreChats) return
+    loadingChatsRef.current = true
+    try {
+      const page = await chatStorage.listChatSummaries(savedChats.length)
+      setSavedChats(prev => [...prev, ...page.filter(chat => !prev.some(c => c.id === chat.id))])
+      setHasMoreChats(page.length === chatStorage.CHATS_PAGE_SIZE)
+    } catch (error) {
+      console.error('Error:', error)
+    } finally {
+      loadingChatsRef.current = false
+    }
+  }
+
+  const handleChatListScroll = (e: React.UIEvent<HTMLDivElement>) => {
+    const list = e.currentTarget
+    if (list.scrollHeight - list.scrollTop - list.clientHeight < 50) {
+      loadMoreChats()
+    }
+  }
+
   // Cargar tema guardado al iniciar
   useEffect(() => {
     const savedTheme = localStorage.getItem('theme') as 'light' | 'dark' | null
@@ -332,33 +351,22 @@ export default function Home() {
       document.documentElement.setAttribute('data-theme', 'dark')
     }
     
-    // Cargar chats guardados
-    const chats = localStorage.getItem('atena-chats')
-    if (chats) {
-      setSavedChats(JSON.parse(chats))
-    }
+    // Cargar chats guardados (solo resúmenes, los mensajes se cargan al abrir el chat).
+    // Un fallo en la migración no debe impedir mostrar los chats ya guardados.
+    chatStorage.migrateLegacyChats()
+      .catch(error => console.error('Error:', error))
+      .then(loadMoreChats)
   }, [])
 
   // Guardar chat actual cuando cambian los mensajes
   useEffect(() => {
     if (messages.length > 0 && currentChatId) {
-      const updatedChats = savedChats.map(chat => 
-        chat.id === currentChatId 
-          ? { ...chat, messages, conversationHistory }
-          : chat
-      )
-      setSavedChats(updatedChats)
-      localStorage.setItem('atena-chats', JSON.stringify(updatedChats))
+      saveCurrentChat()
     }
   }, [messages, conversationHistory])
 
-  // Crear nuevo chat
+  // Crear nuevo chat (el chat actual ya está guardado)
   const createNewChat = () => {
-    if (messages.length > 0 && currentChatId) {
-      // Guardar chat actual antes de crear uno nuevo
-      saveCurrentChat()
-    }
-    
     const newId = Date.now().toString()
     setCurrentChatId(newId)
     setMessages([])
@@ -367,55 +375,53 @@ export default function Home() {
     setSidebarOpen(false)
   }
 
-  // Guardar chat actual
+  // Guardar chat actual (solo se escribe este chat)
   const saveCurrentChat = () => {
-    if (messages.length === 0) return
+    if (messages.length === 0 || !currentChatId) return
+
+    // Evitar reescribir un chat que no cambió (por ejemplo, al abrirlo)
+    const lastSaved = lastSavedRef.current
+    if (lastSaved && lastSaved.messages === messages && lastSaved.conversationHistory === conversationHistory) return
+    lastSavedRef.current = { messages, conversationHistory }
     
     const firstMessage = getMessageText(messages[0].content)
     const title = firstMessage.slice(0, 30) + (firstMessage.length > 30 ? '...' : '')
     
-    const existingIndex = savedChats.findIndex(c => c.id === currentChatId)
-    
-    if (existingIndex >= 0) {
-      const updatedChats = [...savedChats]
-      updatedChats[existingIndex] = {
-        ...updatedChats[existingIndex],
-        messages,
-        conversationHistory
-      }
-      setSavedChats(updatedChats)
-      localStorage.setItem('atena-chats', JSON.stringify(updatedChats))
-    } else if (currentChatId) {
-      const newChat: SavedChat = {
-        id: currentChatId,
-        title,
-        messages,
-        conversationHistory,
-        createdAt: Date.now()
-      }
-      const updatedChats = [newChat, ...savedChats]
-      setSavedChats(updatedChats)
-      localStorage.setItem('atena-chats', JSON.stringify(updatedChats))
-    }
+    const now = Date.now()
+    const existing = savedChats.find(c => c.id === currentChatId)
+    const summary: ChatSummary = existing
+      ? { ...existing, updatedAt: now }
+      : { id: currentChatId, title, createdAt: now, updatedAt: now }
+
+    setSavedChats(prev => prev.some(c => c.id === summary.id)
+      ? prev.map(c => c.id === summary.id ? summary : c)
+      : [summary, ...prev]
+    )
+    chatStorage.saveChat(summary, { id: currentChatId, messages, conversationHistory })
+      .catch(error => console.error('Error:', error))
   }
 
   // Cargar chat guardado
-  const loadChat = (chat: SavedChat) => {
-    if (messages.length > 0 && currentChatId) {
-      saveCurrentChat()
+  const loadChat = async (chat: ChatSummary) => {
+    try {
+      const body = await chatStorage.loadChatBody<Message>(chat.id)
+      const loadedMessages = body?.messages || []
+      const loadedHistory = body?.conversationHistory || []
+      lastSavedRef.current = { messages: loadedMessages, conversationHistory: loadedHistory }
+      setCurrentChatId(chat.id)
+      setMessages(loadedMessages)
+      setConversationHistory(loadedHistory)
+      setSidebarOpen(false)
+    } catch (error) {
+      console.error('Error:', error)
     }
-    setCurrentChatId(chat.id)
-    setMessages(chat.messages)
-    setConversationHistory(chat.conversationHistory)
-    setSidebarOpen(false)
   }
 
   // Eliminar chat
   const deleteChat = (chatId: string, e: React.MouseEvent) => {
     e.stopPropagation()
-    const updatedChats = savedChats.filter(c => c.id !== chatId)
-    setSavedChats(updatedChats)
-    localStorage.setItem('atena-chats', JSON.stringify(updatedChats))
+    setSavedChats(prev => prev.filter(c => c.id !== chatId))
+    chatStorage.deleteChat(chatId).catch(error => console.error('Error:', error))
     
     if (currentChatId === chatId) {
       setCurrentChatId(null)
@@ -428,7 +434,8 @@ export default function Home() {
   const clearAllHistory = () => {
     if (confirm(t.clearHistoryConfirm)) {
       setSavedChats([])
-      localStorage.removeItem('atena-chats')
+      setHasMoreChats(false)
+      chatStorage.clearChats().catch(error => console.error('Error:', error))
       setCurrentChatId(null)
       setMessages([])
       setConversationHistory([])
@@ -723,9 +730,6 @@ export default function Home() {
   }
 
   const clearChat = () => {
-    if (messages.length > 0 && currentChatId) {
-      saveCurrentChat()
-    }
     createNewChat()
   }
 
@@ -755,7 +759,7 @@ export default function Home() {
           {t.newChat}
         </button>
 
-        <div className={styles.chatList}>
+        <div className={styles.chatList} onScroll={handleChatListScroll}>
           {savedChats.map(chat => (
             <div
               key={chat.id}